@@ -0,0 +1,175 @@
+import numpy as np
+from numba import njit, prange # type: ignore
+
+
+@njit(fastmath=True, cache=True)
+def _slab_entry(c: float, s: float, 
+                xmin: float, ymin: float, xmax: float, ymax: float, 
+                t_max: float) -> float:
+    """Return the distance at which the beam segment [0, t_max] enters the box (slab test), or -1 if it misses the box.
+
+    The box is given relative to the scanner, so the beam starts at the origin.
+    """
+    t_near = np.float32(0.0)
+    t_far = t_max
+    if abs(c) < 1e-12:
+        if xmin > 0.0 or xmax < 0.0:
+            return np.float32(-1.0)
+    else:
+        tx1 = xmin / c
+        tx2 = xmax / c
+        t_near = max(t_near, min(tx1, tx2))
+        t_far = min(t_far, max(tx1, tx2))
+    if abs(s) < 1e-12:
+        if ymin > 0.0 or ymax < 0.0:
+            return np.float32(-1.0)
+    else:
+        ty1 = ymin / s
+        ty2 = ymax / s
+        t_near = max(t_near, min(ty1, ty2))
+        t_far = min(t_far, max(ty1, ty2))
+    if t_near > t_far:
+        return np.float32(-1.0)
+    return t_near
+
+
+# A single signature for all scan and map sizes, compiled once and cached on disk.
+# Kernels specialized on the shape (sizes as constants) were tried: they recompile per shape, 
+# cannot use the disk cache and were not measurably faster.
+@njit('void(f8, f8, f4[::1], f4[::1], '
+      'f8[::1], f8[::1], f4[::1], f4[::1], '
+      'f8[::1], f8[::1], f8[::1], f8[::1], '
+      'i8[::1], i8[::1], f8[:, ::1], '
+      'f8, f8[::1], f8[:, ::1])', 
+      parallel=True, fastmath=True, cache=True)
+def raycast(px: float, py: float, 
+            cos_a: np.ndarray, sin_a: np.ndarray, 
+            x1: np.ndarray, y1: np.ndarray, dx: np.ndarray, dy: np.ndarray, 
+            xmin: np.ndarray, ymin: np.ndarray, xmax: np.ndarray, ymax: np.ndarray, 
+            edge_start: np.ndarray, edge_end: np.ndarray, 
+            boxes: np.ndarray, 
+            range_max: float, 
+            ranges: np.ndarray, end_points: np.ndarray) -> None:
+    """Cast all beams against all edges, keeping only the closest hit per beam.
+
+    The edges are grouped by polygon. A polygon is skipped for a beam if its bounding box is not crossed by the beam.
+    Axis-aligned rectangular obstacles are given as boxes and hit-tested directly with the slab test.
+    Absolute coordinates (the scanner, edge start points, bounding boxes and end points) are float64.
+    The loops only use float32 values relative to the scanner (beam directions, edge vectors, and the map 
+    shifted by the scanner position once per call), so the accuracy does not depend on the map offset.
+
+    Args:
+        px: The x coordinate of the scanner.
+        py: The y coordinate of the scanner.
+        cos_a: The cosine of the absolute beam angles, shape (B,).
+        sin_a: The sine of the absolute beam angles, shape (B,).
+        x1: The x coordinates of the edge start points, shape (E,).
+        y1: The y coordinates of the edge start points, shape (E,).
+        dx: The x components of the edge vectors, shape (E,).
+        dy: The y components of the edge vectors, shape (E,).
+        xmin, ymin, xmax, ymax: The bounding boxes of the polygons, shape (P,).
+        edge_start: The index of the first edge of each polygon, shape (P,).
+        edge_end: The index after the last edge of each polygon, shape (P,).
+        boxes: The axis-aligned box obstacles, each row is (xmin, ymin, xmax, ymax), shape (K, 4).
+        range_max: The maximum range of the beams.
+        ranges: [Output] The distance to the closest edge for each beam (range_max if none is hit), shape (B,).
+        end_points: [Output] The end points of the beams, shape (B, 2).
+    """
+    n_beams = cos_a.shape[0]
+    n_polys = edge_start.shape[0]
+    n_boxes = boxes.shape[0]
+    t_max = np.float32(range_max)
+    rx = (x1 - px).astype(np.float32)
+    ry = (y1 - py).astype(np.float32)
+    rxmin = (xmin - px).astype(np.float32)
+    rymin = (ymin - py).astype(np.float32)
+    rxmax = (xmax - px).astype(np.float32)
+    rymax = (ymax - py).astype(np.float32)
+    rboxes = np.empty((n_boxes, 4), dtype=np.float32)
+    for k in range(n_boxes):
+        rboxes[k, 0] = boxes[k, 0] - px
+        rboxes[k, 1] = boxes[k, 1] - py
+        rboxes[k, 2] = boxes[k, 2] - px
+        rboxes[k, 3] = boxes[k, 3] - py
+    for b in prange(n_beams):
+        c = cos_a[b]
+        s = sin_a[b]
+        best_t = t_max
+        for k in range(n_boxes):
+            t = _slab_entry(c, s, rboxes[k, 0], rboxes[k, 1], rboxes[k, 2], rboxes[k, 3], best_t)
+            if t >= 0.0:
+                best_t = t
+        for p in range(n_polys):
+            if _slab_entry(c, s, rxmin[p], rymin[p], rxmax[p], rymax[p], best_t) < 0.0:
+                continue
+            for e in range(edge_start[p], edge_end[p]):
+                denom = c*dy[e] - s*dx[e]
+                if abs(denom) < 1e-12:
+                    continue
+                t = (rx[e]*dy[e] - ry[e]*dx[e]) / denom
+                if t < 0.0 or t >= best_t:
+                    continue
+                u = (rx[e]*s - ry[e]*c) / denom
+                if 0.0 <= u <= 1.0:
+                    best_t = t
+        ranges[b] = best_t
+        end_points[b, 0] = px + best_t*c
+        end_points[b, 1] = py + best_t*s
+
+
+@njit(cache=True)
+def _locate_in_ring(px: float, py: float, xs: np.ndarray, ys: np.ndarray) -> int:
+    """Locate a point relative to a (closed) ring of vertices using ray casting (even-odd rule).
+
+    Returns:
+        1 if the point is inside the ring, 0 if it is on the ring, -1 if it is outside.
+    """
+    inside = False
+    n = xs.shape[0]
+    j = n - 1
+    for i in range(n):
+        cross = (px - xs[j]) * (ys[i] - ys[j]) - (py - ys[j]) * (xs[i] - xs[j])
+        if (cross == 0.0 
+                and min(xs[i], xs[j]) <= px <= max(xs[i], xs[j]) 
+                and min(ys[i], ys[j]) <= py <= max(ys[i], ys[j])):
+            return 0
+        if (ys[i] > py) != (ys[j] > py):
+            x_cross = xs[i] + (py - ys[i]) * (xs[j] - xs[i]) / (ys[j] - ys[i])
+            if px < x_cross:
+                inside = not inside
+        j = i
+    return 1 if inside else -1
+
+
+@njit(cache=True)
+def point_in_ring(px: float, py: float, xs: np.ndarray, ys: np.ndarray) -> bool:
+    """Check if a point is strictly inside a (closed) ring of vertices.
+
+    Points on the ring itself are not inside, the same as `Polygon.contains` in Shapely.
+    """
+    return _locate_in_ring(px, py, xs, ys) > 0
+
+
+@njit(cache=True)
+def point_in_polygons(px: float, py: float, xs: np.ndarray, ys: np.ndarray, 
+                      ring_start: np.ndarray, ring_end: np.ndarray, 
+                      poly_ring_start: np.ndarray, poly_ring_end: np.ndarray) -> bool:
+    """Check if a point is inside or on any of the polygons (the same as `Polygon.intersects` in Shapely).
+
+    Args:
+        px, py: The point.
+        xs, ys: The vertices of all rings, concatenated.
+        ring_start, ring_end: The vertex slice of each ring.
+        poly_ring_start, poly_ring_end: The ring slice of each polygon (its exterior and holes).
+    """
+    for p in range(poly_ring_start.shape[0]):
+        inside = False
+        for r in range(poly_ring_start[p], poly_ring_end[p]):
+            loc = _locate_in_ring(px, py, xs[ring_start[r]:ring_end[r]], ys[ring_start[r]:ring_end[r]])
+            if loc == 0:
+                return True
+            if loc > 0:
+                inside = not inside
+        if inside:
+            return True
+    return False
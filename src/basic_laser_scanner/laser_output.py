@@ -1,7 +1,7 @@
 from dataclasses import dataclass, field
 import math
 import warnings
-from typing import Any, TypedDict
+from typing import Optional, TypedDict
 
 import numpy as np
 
@@ -15,11 +15,12 @@ class LaserScanConfig(TypedDict):
     frame_id: str
 
 
-@dataclass
+@dataclass(slots=True)
 class LaserScanOutput:
     """
     Data class for the output of the laser scanner (in 2D).
     Similar to the sensor_msgs/LaserScan message in ROS.
+    Setting an attribute which is not a field raises an AttributeError (slots).
     """
     timestamp: float = 0.0
     frame_id: str = ""
@@ -29,32 +30,40 @@ class LaserScanOutput:
     angle_max: float = math.pi/2
     angle_increment: float = math.pi/180
     _angles: tuple[float, ...] = field(default_factory=tuple)
+    _angles_np: np.ndarray = field(init=False, repr=False)
+    _angles_deg_cache: Optional[tuple[float, ...]] = field(default=None, init=False, repr=False)
 
     range_min: float = 0.0
     range_max: float = 10.0
-    _ranges: list[float] = field(default_factory=list)
-    _beam_end_points: list[tuple[float, float]] = field(default_factory=list)
-
-    __fronzen__ = False
+    _ranges: np.ndarray = field(default_factory=lambda: np.empty(0))
+    _beam_end_points: np.ndarray = field(default_factory=lambda: np.empty((0, 2)))
 
     @property
     def angles(self) -> tuple[float, ...]:
+        if not self._angles:
+            self._angles = tuple(self._angles_np.tolist())
         return self._angles
 
+    @property
+    def angles_np(self) -> np.ndarray:
+        return self._angles_np
+
     @property
     def angles_deg(self) -> tuple[float, ...]:
-        return tuple([round(math.degrees(angle), 4) for angle in self.angles])
+        if self._angles_deg_cache is None:
+            self._angles_deg_cache = tuple(np.degrees(self._angles_np).round(4).tolist())
+        return self._angles_deg_cache
     
     @property
     def state(self) -> list[float]:
         return self._state
     
     @property
-    def ranges(self) -> list[float]:
+    def ranges(self) -> np.ndarray:
         return self._ranges
     
     @property
-    def beam_end_points(self) -> list[tuple[float, float]]:
+    def beam_end_points(self) -> np.ndarray:
         return self._beam_end_points
 
     def __post_init__(self):
@@ -65,13 +74,23 @@ class LaserScanOutput:
         if (self.angle_min >= 0.0) or (self.angle_max <= 0.0):
             warnings.warn("Assumeing the heading direction is 0.0 rad, angle_min is expected to be negative and angle_max is expected to be positive.")
 
-        self._angles = tuple(np.arange(self.angle_min, self.angle_max+self.angle_increment/2, self.angle_increment).tolist())
-        self.__fronzen__ = True
-
-    def __setattr__(self, __name: str, __value: Any) -> None:
-        if self.__fronzen__ and (not hasattr(self, __name)):
-            raise AttributeError(f"Cannot set attribute {__name} of {self.__class__.__name__}")
-        super().__setattr__(__name, __value)
+        self._angles_np = np.arange(self.angle_min, self.angle_max+self.angle_increment/2, self.angle_increment, dtype=np.float64)
+        self._angles_np.setflags(write=False) # shared through `angles_np`
+        self._angles = () # built on first access of `angles`
+        self._angles_deg_cache = None
+        self._ranges = np.full(len(self._angles_np), self.range_max)
+        self._beam_end_points = np.zeros((len(self._angles_np), 2))
+
+    def __eq__(self, other: object) -> bool:
+        """Compare the configuration, state and scan data (the array fields element-wise)."""
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return ((self.timestamp, self.frame_id, self._state, 
+                 self.angle_min, self.angle_max, self.angle_increment, self.range_min, self.range_max) == 
+                (other.timestamp, other.frame_id, other._state, 
+                 other.angle_min, other.angle_max, other.angle_increment, other.range_min, other.range_max)
+                and np.array_equal(self._ranges, other._ranges) 
+                and np.array_equal(self._beam_end_points, other._beam_end_points))
 
     @classmethod
     def from_config(cls, config: LaserScanConfig) -> 'LaserScanOutput':
@@ -82,32 +101,45 @@ class LaserScanOutput:
                    range_max=config['range_max'], 
                    frame_id=config['frame_id'])
 
-    def init_beams(self, current_position: tuple[float, float], heading: float):
+    def init_beams(self, current_position: tuple[float, float], heading: float, fast: bool = False):
         """Initialize the beams of the laser scanner.
+
+        Args:
+            current_position: The current position of the scanner, (x, y).
+            heading: The current heading of the scanner, in radian.
+            fast: If True, the beam end points are not computed.
+                Use this when the beams are overwritten right after (e.g. by a scan).
         """
         self._state = [current_position[0], current_position[1], heading]
-        self._beam_end_points = []
-        self._ranges = [self.range_max] * len(self.angles)
-        for angle in self.angles:
-            x = current_position[0] + self.range_max * math.cos(heading + angle)
-            y = current_position[1] + self.range_max * math.sin(heading + angle)
-            self.beam_end_points.append((x, y))
-
-    def update_ranges_and_beams(self, current_time: float, new_ranges: list[float], new_beam_end_points: list[tuple[float, float]]):
+        self._ranges.fill(self.range_max)
+        if fast:
+            return
+        angles = heading + self._angles_np
+        np.multiply(self.range_max, np.cos(angles), out=self._beam_end_points[:, 0])
+        np.multiply(self.range_max, np.sin(angles), out=self._beam_end_points[:, 1])
+        self._beam_end_points += current_position
+
+    def update_ranges_and_beams(self, current_time: float, new_ranges: np.ndarray, new_beam_end_points: np.ndarray):
         """Update the ranges and beam end points of the laser scanner.
 
         Args:
             current_time: The current time.
-            new_ranges: The new ranges. The length should be the same as the original ranges.
-            new_beam_end_points: The new beam end points. The length should be the same as the original beam end points.
+            new_ranges: The new ranges. The shape should be the same as the original ranges, (N,).
+            new_beam_end_points: The new beam end points. The shape should be the same as the original beam end points, (N, 2).
+
+        Notes:
+            The values are copied into the existing buffers, which are never rebound.
+            Passing the buffers themselves (as the scanner does) skips the copy.
         """
-        if len(new_ranges) != len(self._ranges):
-            raise ValueError(f"The length of new_ranges should be {len(self._ranges)}, got {len(new_ranges)}.")
-        if len(new_beam_end_points) != len(self._beam_end_points):
-            raise ValueError(f"The length of new_beam_end_points should be {len(self._beam_end_points)}, got {len(new_beam_end_points)}.")
+        if np.shape(new_ranges) != self._ranges.shape:
+            raise ValueError(f"The shape of new_ranges should be {self._ranges.shape}, got {np.shape(new_ranges)}.")
+        if np.shape(new_beam_end_points) != self._beam_end_points.shape:
+            raise ValueError(f"The shape of new_beam_end_points should be {self._beam_end_points.shape}, got {np.shape(new_beam_end_points)}.")
         self.timestamp = current_time
-        self._ranges = new_ranges
-        self._beam_end_points = new_beam_end_points
+        if new_ranges is not self._ranges:
+            np.copyto(self._ranges, new_ranges)
+        if new_beam_end_points is not self._beam_end_points:
+            np.copyto(self._beam_end_points, new_beam_end_points)
 
 
 if __name__ == "__main__":
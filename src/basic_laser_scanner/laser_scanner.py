@@ -1,18 +1,32 @@
-import math
+import os
 import yaml # type: ignore
 import warnings
-from typing import TypedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, TypedDict
 
 import numpy as np
-from shapely.geometry import Point, LineString, Polygon # type: ignore
+import shapely # type: ignore
+from shapely.geometry import Polygon # type: ignore
 from shapely.geometry.base import BaseGeometry # type: ignore
 from matplotlib.axes import Axes # type: ignore
 
 from .laser_output import LaserScanOutput, LaserScanConfig
 
+try:
+    from ._raycast_numba import raycast as _raycast_numba
+    from ._raycast_numba import point_in_ring as _point_in_ring_numba
+    from ._raycast_numba import point_in_polygons as _point_in_polygons_numba
+except ImportError:
+    _raycast_numba = None
+    _point_in_ring_numba = None
+    _point_in_polygons_numba = None
+
 
 PathNode = tuple[float, float]
 
+# Minimal number of (beam, edge) pairs to split the NumPy ray casting over threads
+PARALLEL_MIN_PAIRS = 200_000
+
 
 class BasicMap(TypedDict):
     boundary_coords: list[PathNode]
@@ -51,6 +65,47 @@ class LaserScanner:
 
     def load_map(self, boundary_coords: list[PathNode], obstacle_list: list[list[PathNode]]) -> None:
         self._map = BasicMap(boundary_coords=boundary_coords, obstacle_list=obstacle_list)
+        self._boundary_polygon = Polygon(boundary_coords)
+        shapely.prepare(self._boundary_polygon)
+        self._boundary_xy = np.asarray(boundary_coords, dtype=np.float64)
+        self._boundary_xs = np.ascontiguousarray(self._boundary_xy[:, 0])
+        self._boundary_ys = np.ascontiguousarray(self._boundary_xy[:, 1])
+
+        geometries = [Polygon(obstacle) for obstacle in obstacle_list]
+        self._geometries = [geo if geo.is_valid else geo.buffer(0) for geo in geometries]
+        self._obstacle_rings = self._polygon_rings(self._geometries)
+        self._geometry_array = np.empty(len(self._geometries), dtype=object)
+        self._geometry_array[:] = self._geometries
+        shapely.prepare(self._geometry_array)
+
+        # Axis-aligned rectangles are hit-tested directly with the slab test, the rest edge by edge
+        boxes = [geo.bounds for geo in self._geometries if self._is_axis_aligned_box(geo)]
+        self._aabb_boxes = np.array(boxes, dtype=np.float64).reshape(-1, 4) # (xmin, ymin, xmax, ymax) per row
+
+        edges = [self._polygon_edges(boundary_coords)]
+        edges += [self._geometry_edges(geo) for geo in self._geometries if not self._is_axis_aligned_box(geo)]
+        edges = [e for e in edges if len(e) > 0]
+        self._edges = np.concatenate(edges, axis=0) # (x1, y1, x2, y2) per row
+        self._edges_x1 = np.ascontiguousarray(self._edges[:, 0])
+        self._edges_y1 = np.ascontiguousarray(self._edges[:, 1])
+        self._edges_dx = (self._edges[:, 2] - self._edges[:, 0]).astype(np.float32) # relative, float32 is enough
+        self._edges_dy = (self._edges[:, 3] - self._edges[:, 1]).astype(np.float32)
+
+        # Per-polygon bounding boxes and edge slices (polygon 0 is the boundary)
+        n_edges = np.array([len(e) for e in edges], dtype=np.int64)
+        self._poly_edge_end = np.cumsum(n_edges)
+        self._poly_edge_start = self._poly_edge_end - n_edges
+        self._poly_xmin = np.array([min(e[:, 0].min(), e[:, 2].min()) for e in edges])
+        self._poly_ymin = np.array([min(e[:, 1].min(), e[:, 3].min()) for e in edges])
+        self._poly_xmax = np.array([max(e[:, 0].max(), e[:, 2].max()) for e in edges])
+        self._poly_ymax = np.array([max(e[:, 1].max(), e[:, 3].max()) for e in edges])
+
+        # Everything the ray casting kernel needs from the map, in its argument order
+        self._edges_soa = (self._edges_x1, self._edges_y1, self._edges_dx, self._edges_dy)
+        self._raycast_map_args = (*self._edges_soa, 
+                                  self._poly_xmin, self._poly_ymin, self._poly_xmax, self._poly_ymax, 
+                                  self._poly_edge_start, self._poly_edge_end, 
+                                  self._aabb_boxes)
         self._map_prepared = True
 
     def load_scanner(self, init_position: PathNode, init_heading: float) -> None:
@@ -87,36 +142,170 @@ class LaserScanner:
         
         self._state = current_state
         self.laser_scan.timestamp = current_time
-        self.laser_scan.init_beams(self.position, self.heading)
+        if _point_in_ring_numba is not None:
+            inside = _point_in_ring_numba(current_state[0], current_state[1], self._boundary_xs, self._boundary_ys)
+        else:
+            inside = bool(shapely.contains_xy(self._boundary_polygon, current_state[0], current_state[1]))
+        self.laser_scan.init_beams(self.position, self.heading, fast=inside)
 
-        if not Polygon(self._map['boundary_coords']).contains(Point(current_state[0], current_state[1])):
+        if not inside:
             warnings.warn("Scanner is outside the boundary!")
             return self.laser_scan
 
-        _x, _y = self.position
-        new_ranges = self.laser_scan.ranges.copy()
-        new_beams = self.laser_scan.beam_end_points.copy()
-        geometries = [Polygon(obstacle) for obstacle in self._map['obstacle_list']]
-        geometries.append(LineString(self._map['boundary_coords'] + [self._map['boundary_coords'][0]]))
-        for i, relative_angle in enumerate(self.laser_scan.angles):
-            angle = self.heading + relative_angle
-            beam = LineString([(_x, _y), (_x+self.laser_scan.range_max*math.cos(angle), _y+self.laser_scan.range_max*math.sin(angle))])
-            closest_distance = self.laser_scan.range_max
-            for geo in geometries:
-                if not geo.is_valid:
-                    geo = geo.buffer(0)
-                if beam.intersects(geo):
-                    intersection:BaseGeometry = beam.intersection(geo)
-                    if not intersection.is_empty:
-                        distance = intersection.distance(Point(_x, _y))
-                        if distance < closest_distance:
-                            closest_distance = distance
-            new_ranges[i] = closest_distance
-            new_beams[i] = (_x+closest_distance*math.cos(angle), _y+closest_distance*math.sin(angle))
-
-        self.laser_scan.update_ranges_and_beams(current_time, new_ranges, new_beams)
+        _x, _y = float(self.position[0]), float(self.position[1])
+        if _point_in_polygons_numba is not None:
+            blocked = _point_in_polygons_numba(_x, _y, *self._obstacle_rings)
+        else:
+            blocked = bool(shapely.intersects_xy(self._geometry_array, _x, _y).any())
+        if blocked:
+            # Inside (or on) an obstacle, every beam is blocked right at the scanner.
+            self.laser_scan.ranges.fill(0.0)
+            self.laser_scan.beam_end_points[:] = (_x, _y)
+            self.laser_scan.update_ranges_and_beams(current_time, self.laser_scan.ranges, self.laser_scan.beam_end_points)
+            return self.laser_scan
+
+        angles = self.heading + self.laser_scan.angles_np
+        cos_a = np.cos(angles).astype(np.float32) # the ray casting works in float32 relative to the scanner
+        sin_a = np.sin(angles).astype(np.float32)
+        ranges = self.laser_scan.ranges
+        beams = self.laser_scan.beam_end_points
+        if _raycast_numba is not None:
+            _raycast_numba(_x, _y, cos_a, sin_a, *self._raycast_map_args, self.laser_scan.range_max, ranges, beams)
+        else:
+            self._raycast_threaded(_x, _y, cos_a, sin_a, out=ranges)
+            np.multiply(ranges, cos_a, out=beams[:, 0])
+            np.multiply(ranges, sin_a, out=beams[:, 1])
+            beams += (_x, _y)
+
+        self.laser_scan.update_ranges_and_beams(current_time, ranges, beams)
         return self.laser_scan
+
+    def _raycast_threaded(self, x: float, y: float, cos_a: np.ndarray, sin_a: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """Run the NumPy ray casting on chunks of beams in a thread pool (NumPy releases the GIL).
+
+        Small problems are cast in the calling thread since the threading overhead would dominate.
+        """
+        n_beams = len(cos_a)
+        n_threads = min(os.cpu_count() or 1, n_beams)
+        if n_threads < 2 or n_beams*(len(self._edges)+len(self._aabb_boxes)) < PARALLEL_MIN_PAIRS:
+            return self._raycast(x, y, cos_a, sin_a, out=out)
+
+        bounds = np.linspace(0, n_beams, n_threads+1).astype(int)
+        chunks = [slice(lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:])]
+        with ThreadPoolExecutor(max_workers=n_threads) as executor:
+            list(executor.map(lambda c: self._raycast(x, y, cos_a[c], sin_a[c], out=out[c]), chunks))
+        return out
+
+    def _raycast(self, x: float, y: float, cos_a: np.ndarray, sin_a: np.ndarray, out: Optional[np.ndarray]=None) -> np.ndarray:
+        """Cast all beams against all map edges and boxes at once (NumPy fallback if Numba is not available).
+
+        Args:
+            x: The x coordinate of the scanner.
+            y: The y coordinate of the scanner.
+            cos_a: The cosine of the absolute beam angles, shape (B,).
+            sin_a: The sine of the absolute beam angles, shape (B,).
+            out: If given, the ranges are written into this array, shape (B,).
+
+        Returns:
+            The distance to the closest edge or box for each beam (range_max if none is hit), shape (B,).
+        """
+        range_max = self.laser_scan.range_max
+        x1, y1, dx, dy = self._edges_soa
+        rx = (x1 - x).astype(np.float32)[None, :]
+        ry = (y1 - y).astype(np.float32)[None, :]
+        dx = dx[None, :]
+        dy = dy[None, :]
+        c = cos_a[:, None]
+        s = sin_a[:, None]
+
+        denom = c*dy - s*dx
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (rx*dy - ry*dx) / denom # distance along the beam
+            u = (rx*s - ry*c) / denom # position along the edge
+        hit = (np.abs(denom) > 1e-12) & (u >= 0.0) & (u <= 1.0) & (t >= 0.0) & (t <= range_max)
+        ranges = np.where(hit, t, range_max).min(axis=1, out=out)
+        if len(self._aabb_boxes) > 0:
+            np.minimum(ranges, self._raycast_boxes(x, y, cos_a, sin_a), out=ranges)
+        return ranges
+
+    def _raycast_boxes(self, x: float, y: float, cos_a: np.ndarray, sin_a: np.ndarray) -> np.ndarray:
+        """Cast all beams against all axis-aligned boxes at once using the slab test.
+
+        Returns:
+            The distance to the closest box for each beam (range_max if none is hit), shape (B,).
+        """
+        range_max = self.laser_scan.range_max
+        t_near = np.zeros((len(cos_a), len(self._aabb_boxes)), dtype=np.float32)
+        t_far = np.full_like(t_near, range_max)
+        for axis, (p, d) in enumerate(((x, cos_a), (y, sin_a))):
+            lo = (self._aabb_boxes[:, axis] - p).astype(np.float32) # relative to the scanner
+            hi = (self._aabb_boxes[:, axis+2] - p).astype(np.float32)
+            parallel = (np.abs(d) < 1e-12)[:, None]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t1 = lo[None, :] / d[:, None]
+                t2 = hi[None, :] / d[:, None]
+            # A beam parallel to the slab either always or never lies within it
+            within = ((lo <= 0.0) & (0.0 <= hi))[None, :]
+            t1 = np.where(parallel, np.where(within, -np.inf, np.inf), t1)
+            t2 = np.where(parallel, np.inf, t2)
+            np.maximum(t_near, np.minimum(t1, t2), out=t_near)
+            np.minimum(t_far, np.maximum(t1, t2), out=t_far)
+        return np.where(t_near <= t_far, t_near, range_max).min(axis=1)
     
+    @staticmethod
+    def _polygon_edges(vertices: list[PathNode]) -> np.ndarray:
+        """Return the edges of a closed polygon as an array of shape (N, 4), each row is (x1, y1, x2, y2)."""
+        start = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+        end = np.roll(start, -1, axis=0)
+        edges = np.hstack((start, end))
+        return edges[np.any(start != end, axis=1)] # skip degenerate (zero-length) edges
+
+    @staticmethod
+    def _is_axis_aligned_box(geometry: BaseGeometry) -> bool:
+        """Check if a geometry is a (non-degenerate) axis-aligned rectangle."""
+        if not isinstance(geometry, Polygon) or geometry.is_empty or len(geometry.interiors) > 0:
+            return False
+        xy = np.asarray(geometry.exterior.coords)[:-1]
+        xs = np.unique(xy[:, 0])
+        ys = np.unique(xy[:, 1])
+        return len(xy) == 4 and len(xs) == 2 and len(ys) == 2 and len(np.unique(xy, axis=0)) == 4
+
+    @classmethod
+    def _geometry_edges(cls, geometry: BaseGeometry) -> np.ndarray:
+        """Return the edges of all rings of a (multi)polygon as an array of shape (N, 4)."""
+        rings = []
+        for polygon in getattr(geometry, 'geoms', [geometry]):
+            if polygon.is_empty:
+                continue
+            rings.append(polygon.exterior)
+            rings.extend(polygon.interiors)
+        if not rings:
+            return np.empty((0, 4))
+        return np.concatenate([cls._polygon_edges(ring.coords[:-1]) for ring in rings], axis=0)
+
+    @staticmethod
+    def _polygon_rings(geometries: list[BaseGeometry]) -> tuple[np.ndarray, ...]:
+        """Flatten the rings (exterior and holes) of polygonal geometries for the JIT point-in-polygon test.
+
+        Returns:
+            The concatenated ring vertices (xs, ys), the vertex slice of each ring (ring_start, ring_end), 
+            and the ring slice of each polygon (poly_ring_start, poly_ring_end).
+        """
+        rings: list[np.ndarray] = []
+        n_rings: list[int] = []
+        for geometry in geometries:
+            for polygon in getattr(geometry, 'geoms', [geometry]):
+                if polygon.is_empty:
+                    continue
+                rings += [np.asarray(ring.coords, dtype=np.float64).reshape(-1, 2) for ring in [polygon.exterior, *polygon.interiors]]
+                n_rings.append(1 + len(polygon.interiors))
+        vertices = np.concatenate(rings, axis=0) if rings else np.empty((0, 2))
+        n_vertices = np.array([len(ring) for ring in rings], dtype=np.int64)
+        n_polygon_rings = np.array(n_rings, dtype=np.int64)
+        return (np.ascontiguousarray(vertices[:, 0]), np.ascontiguousarray(vertices[:, 1]), 
+                np.cumsum(n_vertices) - n_vertices, np.cumsum(n_vertices), 
+                np.cumsum(n_polygon_rings) - n_polygon_rings, np.cumsum(n_polygon_rings))
+
     def plot(self, ax: Axes, with_map=False):
         if not self._map_prepared:
             raise ValueError("Map not prepared.")
@@ -124,17 +313,23 @@ class LaserScanner:
             raise ValueError("Scanner not prepared.")
         
         if with_map:
-            boundary_plot = np.array(self._map['boundary_coords']+[self._map['boundary_coords'][0]])
+            b = self._boundary_xy
+            boundary_plot = np.vstack((b, b[:1]))
             ax.plot(boundary_plot[:,0], boundary_plot[:,1], 'b-')
             for obstacle in self._map['obstacle_list']:
-                obstacle_plot = np.array(obstacle+[obstacle[0]])
+                obs = np.asarray(obstacle)
+                obstacle_plot = np.vstack((obs, obs[:1]))
                 ax.plot(obstacle_plot[:,0], obstacle_plot[:,1], 'r-')
-            ax.set_xlim(min(np.array(self._map['boundary_coords'])[:,0])-1, max(np.array(self._map['boundary_coords'])[:,0])+1)
-            ax.set_ylim(min(np.array(self._map['boundary_coords'])[:,1])-1, max(np.array(self._map['boundary_coords'])[:,1])+1)
-
+            ax.set_xlim(b[:,0].min()-1, b[:,0].max()+1)
+            ax.set_ylim(b[:,1].min()-1, b[:,1].max()+1)
 
-        for beam in self.laser_scan.beam_end_points:
-            ax.plot([self.position[0], beam[0]], [self.position[1], beam[1]], 'gray', linestyle='-')
+        # All beams in one line plot, separated by NaN
+        n_beams = len(self.laser_scan.beam_end_points)
+        beams_plot = np.full((n_beams, 3, 2), np.nan)
+        beams_plot[:, 0] = self.position
+        beams_plot[:, 1] = self.laser_scan.beam_end_points
+        beams_plot = beams_plot.reshape(-1, 2)
+        ax.plot(beams_plot[:,0], beams_plot[:,1], 'gray', linestyle='-')
         ax.plot(*self.position, 'ro')
         
         
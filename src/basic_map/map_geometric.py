@@ -31,6 +31,8 @@ class GeometricMap:
         """
         self._boundary_coords:list[PathNode] = []
         self._obstacle_info_dict:dict[int, ObstacleInfo] = {}
+        self._boundary_np = np.empty((0, 2))
+        self._obstacle_nps:dict[int, np.ndarray] = {}
 
         self.register_boundary(boundary_coords)
         for obs in obstacle_info_list:
@@ -40,6 +42,16 @@ class GeometricMap:
     def boundary_coords(self):
         return self._boundary_coords
     
+    @property
+    def boundary_np(self) -> np.ndarray:
+        """The boundary coordinates as an array of shape (N, 2)."""
+        return self._boundary_np
+
+    @property
+    def obstacle_np_list(self) -> list[np.ndarray]:
+        """The obstacle coordinates as a list of arrays of shape (N, 2)."""
+        return list(self._obstacle_nps.values())
+
     @property
     def obstacle_coords_list(self):
         obs_coords_list = []
@@ -101,6 +113,7 @@ class GeometricMap:
         if len(obstacle['vertices'][0])!=2:
             raise TypeError('All coordinates must be 2-dimension.')
         self._obstacle_info_dict[obstacle['id_']] = obstacle
+        self._obstacle_nps[obstacle['id_']] = np.asarray(obstacle['vertices'], dtype=np.float64)
 
     def register_boundary(self, vertices: list[PathNode]) -> None:
         """Check and register the boundary to the map."""
@@ -109,21 +122,22 @@ class GeometricMap:
         if len(vertices[0])!=2:
             raise TypeError('All coordinates must be 2-dimension.')
         self._boundary_coords = vertices
+        self._boundary_np = np.asarray(vertices, dtype=np.float64)
 
     def map_coords_cvt(self, ct: Callable):
         self._boundary_coords = [ct(x) for x in self._boundary_coords]
+        self._boundary_np = np.asarray(self._boundary_coords, dtype=np.float64)
         for idx in list(self._obstacle_info_dict):
             obs = self._obstacle_info_dict[idx]
             obs['vertices'] = [tuple(ct(x)) for x in obs['vertices']] # type: ignore
+            self._obstacle_nps[idx] = np.asarray(obs['vertices'], dtype=np.float64)
 
 
     def get_boundary_scope(self) -> tuple[float, float, float, float]:
         """Get the boundary scope."""
-        x_min = min([x[0] for x in self._boundary_coords])
-        x_max = max([x[0] for x in self._boundary_coords])
-        y_min = min([x[1] for x in self._boundary_coords])
-        y_max = max([x[1] for x in self._boundary_coords])
-        return x_min, x_max, y_min, y_max
+        x_min, y_min = self._boundary_np.min(axis=0)
+        x_max, y_max = self._boundary_np.max(axis=0)
+        return float(x_min), float(x_max), float(y_min), float(y_max)
 
     def get_occupancy_map(self, rescale:int=100) -> np.ndarray:
         """
@@ -136,34 +150,36 @@ class GeometricMap:
             raise TypeError(f'Rescale factor must be int, got {type(rescale)}.')
         assert(0<rescale<2000),(f'Rescale value {rescale} is abnormal.')
         
-        boundary_np = np.array(self._boundary_coords)
-        width  = max(boundary_np[:,0]) - min(boundary_np[:,0])
-        height = max(boundary_np[:,1]) - min(boundary_np[:,1])
-
-        fig, ax = plt.subplots(figsize=(width, height), dpi=rescale)
-        ax.set_aspect('equal')
-        ax.axis('off')
-        ax.plot(np.array(self._boundary_coords)[:,0], 
-                np.array(self._boundary_coords)[:,1], 'w-')
-        for obs in self.obstacle_coords_list:
-            x = np.array(obs)[:,0]
-            y = np.array(obs)[:,1]
-            plt.fill(x, y, color='k')
-        fig.tight_layout(pad=0)
-        fig.canvas.draw()
-        occupancy_map = np.frombuffer(fig.canvas.tostring_rgb(), dtype=np.uint8) # type: ignore
-        occupancy_map = occupancy_map.reshape(fig.canvas.get_width_height()[::-1] + (3,))
-        plt.close()
+        x_min, x_max, y_min, y_max = self.get_boundary_scope()
+        width  = int(round((x_max - x_min) * rescale))
+        height = int(round((y_max - y_min) * rescale))
+        occupancy_map = np.full((height, width, 3), 255, dtype=np.uint8)
+
+        # Pixel centers in map coordinates (the first row is the top of the map)
+        px_all = x_min + (np.arange(width) + 0.5) / rescale
+        py_all = y_max - (np.arange(height) + 0.5) / rescale
+        for obs in self.obstacle_np_list:
+            cols = np.nonzero((px_all >= obs[:,0].min()) & (px_all <= obs[:,0].max()))[0]
+            rows = np.nonzero((py_all >= obs[:,1].min()) & (py_all <= obs[:,1].max()))[0]
+            if cols.size == 0 or rows.size == 0:
+                continue
+            px, py = np.meshgrid(px_all[cols], py_all[rows])
+            inside = np.zeros(px.shape, dtype=bool)
+            for (x1, y1), (x2, y2) in zip(obs, np.roll(obs, -1, axis=0)): # even-odd rule
+                if y1 == y2:
+                    continue
+                crossing = (y1 > py) != (y2 > py)
+                x_cross = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+                inside ^= crossing & (px < x_cross)
+            occupancy_map[rows[0]:rows[-1]+1, cols[0]:cols[-1]+1][inside] = 0
         return occupancy_map
 
     def plot(self, ax: Axes, original_plot_args:dict={'c':'k'}, obstacle_filled=True, plot_boundary:bool=True):
         if plot_boundary:
-            ax.plot(np.array(self._boundary_coords+[self._boundary_coords[0]])[:,0], 
-                    np.array(self._boundary_coords+[self._boundary_coords[0]])[:,1], 
-                    **original_plot_args)
-        for obs in self.obstacle_coords_list:
-            ax.fill(np.array(obs)[:,0], np.array(obs)[:,1], 
-                    fill=obstacle_filled, **original_plot_args)
+            boundary_plot = np.vstack((self._boundary_np, self._boundary_np[:1]))
+            ax.plot(boundary_plot[:,0], boundary_plot[:,1], **original_plot_args)
+        for obs in self.obstacle_np_list:
+            ax.fill(obs[:,0], obs[:,1], fill=obstacle_filled, **original_plot_args)
 
     @staticmethod
     def dict_to_obstacle_info(obstacle_dict: dict) -> ObstacleInfo:
@@ -0,0 +1,120 @@
+import os
+import math
+import pathlib
+import warnings
+
+import numpy as np
+from shapely.geometry import Point, LineString, Polygon # type: ignore
+
+import basic_laser_scanner.laser_scanner as laser_scanner_module
+from basic_laser_scanner.laser_scanner import LaserScanner
+from basic_map.map_geometric import GeometricMap
+
+CASES = [("dense_scanner_spec.yaml", "test_map_1"),
+         ("sparse_scanner_spec.yaml", "test_map_2"),
+         ("dense_scanner_spec.yaml", "test_map_2")]
+
+RELATIVE_TOLERANCE = 64 * float(np.finfo(np.float32).eps) # of the largest length in the scene
+
+
+def reference_scan(scanner: LaserScanner, state: list[float]) -> tuple[np.ndarray, np.ndarray]:
+    """The original (slow) Shapely implementation of the scan, used as the reference."""
+    boundary_coords = [tuple(x) for x in scanner._map['boundary_coords']]
+    obstacle_list = [[tuple(x) for x in obs] for obs in scanner._map['obstacle_list']]
+    range_max = scanner.laser_scan.range_max
+    _x, _y, heading = float(state[0]), float(state[1]), float(state[2])
+
+    angles = [heading + a for a in scanner.laser_scan.angles]
+    ranges = np.full(len(angles), range_max)
+    if not Polygon(boundary_coords).contains(Point(_x, _y)):
+        return ranges, np.array([(_x+range_max*math.cos(a), _y+range_max*math.sin(a)) for a in angles])
+
+    geometries = [Polygon(obstacle) for obstacle in obstacle_list]
+    geometries = [geo if geo.is_valid else geo.buffer(0) for geo in geometries]
+    geometries.append(LineString(boundary_coords + [boundary_coords[0]]))
+    for i, angle in enumerate(angles):
+        beam = LineString([(_x, _y), (_x+range_max*math.cos(angle), _y+range_max*math.sin(angle))])
+        for geo in geometries:
+            intersection = beam.intersection(geo)
+            if not intersection.is_empty:
+                ranges[i] = min(ranges[i], intersection.distance(Point(_x, _y)))
+    return ranges, np.array([(_x+r*math.cos(a), _y+r*math.sin(a)) for r, a in zip(ranges, angles)])
+
+
+def sample_states(map_obj: GeometricMap, n_random: int = 30, seed: int = 0) -> list[list]:
+    """Scanner states to check: random ones (some fall inside obstacles), on the boundary,
+    on obstacle vertices and edges, and one given as NumPy float64 scalars."""
+    rng = np.random.default_rng(seed)
+    x_min, x_max, y_min, y_max = map_obj.get_boundary_scope()
+    states: list[list] = [[float(rng.uniform(x_min, x_max)), float(rng.uniform(y_min, y_max)), float(rng.uniform(-math.pi, math.pi))]
+                          for _ in range(n_random)]
+    boundary_coords, obstacle_list = map_obj()
+    b = np.asarray(boundary_coords, dtype=float)
+    states.append([float(b[:2, 0].mean()), float(b[:2, 1].mean()), 1.0]) # on the boundary
+    for obstacle in obstacle_list:
+        obs = np.asarray(obstacle, dtype=float)
+        states.append([float(obs[0, 0]), float(obs[0, 1]), 0.5]) # on a vertex
+        states.append([float(obs[:2, 0].mean()), float(obs[:2, 1].mean()), -0.5]) # on an edge
+        states.append([float(obs[:, 0].mean()), float(obs[:, 1].mean()), 2.0])
+    states.append(list(np.array([1.0, 1.0, math.radians(45)]))) # float64 scalars
+    return states
+
+
+def numba_hooks() -> list[str]:
+    """The module level JIT functions of the scanner, the NumPy path is used when they are None."""
+    return [name for name in vars(laser_scanner_module) if name.endswith("_numba")]
+
+
+def numba_backends() -> list[bool]:
+    hooks = numba_hooks()
+    if not hooks or any(getattr(laser_scanner_module, name) is None for name in hooks):
+        return [False]
+    return [True, False]
+
+
+def check_scanner(config_file_name: str, map_name: str, use_numba: bool) -> float:
+    """Compare the scanner with the reference implementation, return the largest difference."""
+    root_dir = pathlib.Path(__file__).resolve().parents[1]
+    config_fpath = os.path.join(root_dir, "config", config_file_name)
+    map_path = os.path.join(root_dir, "data", map_name, "map.json")
+    map_obj = GeometricMap.from_json(map_path)
+
+    saved = {name: getattr(laser_scanner_module, name) for name in numba_hooks()}
+    if not use_numba:
+        for name in saved:
+            setattr(laser_scanner_module, name, None)
+    try:
+        scanner = LaserScanner.from_yaml(config_fpath)
+        scanner.load_map(*map_obj())
+        scanner.load_scanner((1.0, 1.0), 0.0)
+        x_min, x_max, y_min, y_max = map_obj.get_boundary_scope()
+        scale = max(scanner.laser_scan.range_max, x_max-x_min, y_max-y_min)
+        tolerance = RELATIVE_TOLERANCE * scale
+        max_diff = 0.0
+        for state in sample_states(map_obj):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                laser_scan = scanner.scan(0.0, state)
+            ref_ranges, ref_beams = reference_scan(scanner, state)
+            diff = max(np.abs(np.asarray(laser_scan.ranges) - ref_ranges).max(),
+                       np.abs(np.asarray(laser_scan.beam_end_points) - ref_beams).max())
+            if diff > tolerance:
+                raise AssertionError(f"{config_file_name}/{map_name} (numba={use_numba}) differs from the reference by {diff} at {state}.")
+            max_diff = max(max_diff, diff)
+    finally:
+        for name, func in saved.items():
+            setattr(laser_scanner_module, name, func)
+    return max_diff
+
+
+def test_raycast():
+    for use_numba in numba_backends():
+        for config_file_name, map_name in CASES:
+            check_scanner(config_file_name, map_name, use_numba)
+
+
+if __name__ == "__main__":
+    for use_numba in numba_backends():
+        for config_file_name, map_name in CASES:
+            max_diff = check_scanner(config_file_name, map_name, use_numba)
+            print(f"{config_file_name}/{map_name} (numba={use_numba}): max difference {max_diff:.2e}")